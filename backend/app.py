@@ -3,9 +3,10 @@ from flask_cors import CORS
 import jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
 from bson.objectid import ObjectId
 import config
+import responses
 
 # Mappa dei ruoli per i permessi
 ROLE_LEVEL = {
@@ -14,8 +15,14 @@ ROLE_LEVEL = {
     "admin": 3,
 }
 
+# Dimensione dei blocchi di id/operazioni nelle operazioni massive
+BULK_CHUNK_SIZE = 500
+# Numero massimo di utenti bannabili con una singola richiesta
+BULK_MAX_IDS = 5000
+
 app = Flask(__name__)
 CORS(app)  # permette al frontend (JS) di chiamare le API
+responses.init_app(app)  # JSON con tipi BSON nativi + compressione gzip
 
 # Connessione a MongoDB
 client = MongoClient(config.MONGO_URI)
@@ -247,11 +254,6 @@ def list_torrents():
     cursor = db.torrents.find(query).sort(sort_field, sort_direction).limit(100)
     torrents = list(cursor)
 
-    for t in torrents:
-        t["_id"] = str(t["_id"])
-        if "uploaded_by" in t and isinstance(t["uploaded_by"], ObjectId):
-            t["uploaded_by"] = str(t["uploaded_by"])
-
     return jsonify(torrents)
 
 
@@ -328,15 +330,50 @@ def get_torrent(torrent_id):
     if not torrent:
         return jsonify({"error": "Not found"}), 404
 
-    torrent["_id"] = str(torrent["_id"])
-    if "uploaded_by" in torrent and isinstance(torrent["uploaded_by"], ObjectId):
-        torrent["uploaded_by"] = str(torrent["uploaded_by"])
-
     return jsonify(torrent)
 
 
 # ----------------- COMMENTI -----------------
 
+def chunked(items, size=BULK_CHUNK_SIZE):
+    """Divide una lista in blocchi di al massimo size elementi."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def recompute_ratings(torrent_ids):
+    """Ricalcola media e conteggio valutazioni per più torrent con una sola aggregazione."""
+    torrent_ids = list(torrent_ids)
+    if not torrent_ids:
+        return 0
+
+    stats_by_torrent = {}
+    for chunk in chunked(torrent_ids):
+        pipeline = [
+            {"$match": {"torrent_id": {"$in": chunk}, "deleted": False}},
+            {"$group": {"_id": "$torrent_id", "avgRating": {"$avg": "$rating"}, "count": {"$sum": 1}}}
+        ]
+        for s in db.comments.aggregate(pipeline):
+            stats_by_torrent[s["_id"]] = s
+
+    updates = []
+    for t_id in torrent_ids:
+        s = stats_by_torrent.get(t_id)
+        if s:
+            fields = {
+                "average_rating": float(round(s["avgRating"], 2)),
+                "ratings_count": int(s["count"])
+            }
+        else:
+            fields = {"average_rating": 0, "ratings_count": 0}
+        updates.append(UpdateOne({"_id": t_id}, {"$set": fields}))
+
+    for chunk in chunked(updates):
+        db.torrents.bulk_write(chunk, ordered=False)
+
+    return len(updates)
+
+
 @app.route("/api/torrents/<torrent_id>/comments", methods=["GET"])
 def list_comments(torrent_id):
     try:
@@ -350,13 +387,6 @@ def list_comments(torrent_id):
         .sort("created_at", DESCENDING)
     )
 
-    for c in comments:
-        c["_id"] = str(c["_id"])
-        if "torrent_id" in c and isinstance(c["torrent_id"], ObjectId):
-            c["torrent_id"] = str(c["torrent_id"])
-        if "author_id" in c and isinstance(c.get("author_id"), ObjectId):
-            c["author_id"] = str(c["author_id"])
-
     return jsonify(comments)
 
 
@@ -401,22 +431,7 @@ def add_comment(torrent_id):
     result = db.comments.insert_one(comment_doc)
 
     # Ricalcolo media valutazioni e conteggio sul torrent
-    pipeline = [
-        {"$match": {"torrent_id": obj_id, "deleted": False}},
-        {"$group": {"_id": "$torrent_id", "avgRating": {"$avg": "$rating"}, "count": {"$sum": 1}}}
-    ]
-    stats = list(db.comments.aggregate(pipeline))
-    if stats:
-        s = stats[0]
-        db.torrents.update_one(
-            {"_id": obj_id},
-            {
-                "$set": {
-                    "average_rating": float(round(s["avgRating"], 2)),
-                    "ratings_count": int(s["count"])
-                }
-            }
-        )
+    recompute_ratings([obj_id])
 
     return jsonify({"inserted_id": str(result.inserted_id)}), 201
 
@@ -454,21 +469,7 @@ def update_comment(comment_id):
     db.comments.update_one({"_id": obj_id}, {"$set": update_fields})
 
     # Ricalcolo media per il torrent
-    torrent_id = comment["torrent_id"]
-    pipeline = [
-        {"$match": {"torrent_id": torrent_id, "deleted": False}},
-        {"$group": {"_id": "$torrent_id", "avgRating": {"$avg": "$rating"}, "count": {"$sum": 1}}}
-    ]
-    stats = list(db.comments.aggregate(pipeline))
-    if stats:
-        s = stats[0]
-        db.torrents.update_one(
-            {"_id": torrent_id},
-            {"$set": {
-                "average_rating": float(round(s["avgRating"], 2)),
-                "ratings_count": int(s["count"])
-            }}
-        )
+    recompute_ratings([comment["torrent_id"]])
 
     return jsonify({"status": "updated"})
 
@@ -491,29 +492,7 @@ def delete_comment(comment_id):
     )
 
     # Ricalcolo media per il torrent
-    torrent_id = comment["torrent_id"]
-    pipeline = [
-        {"$match": {"torrent_id": torrent_id, "deleted": False}},
-        {"$group": {"_id": "$torrent_id", "avgRating": {"$avg": "$rating"}, "count": {"$sum": 1}}}
-    ]
-    stats = list(db.comments.aggregate(pipeline))
-    if stats:
-        s = stats[0]
-        db.torrents.update_one(
-            {"_id": torrent_id},
-            {"$set": {
-                "average_rating": float(round(s["avgRating"], 2)),
-                "ratings_count": int(s["count"])
-            }}
-        )
-    else:
-        db.torrents.update_one(
-            {"_id": torrent_id},
-            {"$set": {
-                "average_rating": 0,
-                "ratings_count": 0
-            }}
-        )
+    recompute_ratings([comment["torrent_id"]])
 
     return jsonify({"status": "deleted"})
 
@@ -591,6 +570,101 @@ def delete_torrent(torrent_id):
     return jsonify({"status": "deleted"})
 
 
+@app.route("/api/users/bulk-ban", methods=["POST"])
+@require_role("moderator")
+def bulk_ban_users():
+    data = request.json or {}
+    reason = (data.get("reason") or "").strip() or "Violazione dei termini"
+    purge_torrents = bool(data.get("purge_torrents"))
+    purge_comments = bool(data.get("purge_comments"))
+
+    raw_ids = data.get("user_ids") or []
+    if isinstance(raw_ids, str):
+        raw_ids = [u.strip() for u in raw_ids.split(",") if u.strip()]
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({"error": "user_ids è obbligatorio"}), 400
+
+    if len(raw_ids) > BULK_MAX_IDS:
+        return jsonify({"error": f"massimo {BULK_MAX_IDS} user_ids per richiesta"}), 400
+
+    user_ids = []
+    invalid = []
+    for raw in raw_ids:
+        # ObjectId(None) genera un id casuale: si accettano solo stringhe
+        if not isinstance(raw, str) or not raw.strip():
+            invalid.append(str(raw))
+            continue
+        try:
+            user_ids.append(ObjectId(raw.strip()))
+        except Exception:
+            invalid.append(raw)
+    user_ids = list(dict.fromkeys(user_ids))
+
+    if invalid:
+        return jsonify({"error": "Invalid user id", "invalid_ids": invalid}), 400
+
+    now = datetime.utcnow()
+
+    # 1) Ban degli utenti
+    banned_count = 0
+    for chunk in chunked(user_ids):
+        result = db.users.update_many(
+            {"_id": {"$in": chunk}},
+            {"$set": {
+                "banned": True,
+                "ban_reason": reason,
+                "banned_until": None
+            }}
+        )
+        banned_count += result.matched_count
+
+    # 2) Eliminazione dei torrent caricati dagli utenti bannati (a cascata su commenti e download)
+    purged_torrent_ids = []
+    deleted_torrents = 0
+    if purge_torrents:
+        purged_torrent_ids = [
+            t["_id"]
+            for t in db.torrents.find({"uploaded_by": {"$in": user_ids}}, {"_id": 1})
+        ]
+        for chunk in chunked(purged_torrent_ids):
+            result = db.torrents.delete_many({"_id": {"$in": chunk}})
+            deleted_torrents += result.deleted_count
+            db.comments.update_many(
+                {"torrent_id": {"$in": chunk}},
+                {"$set": {"deleted": True, "updated_at": now}}
+            )
+            db.downloads.delete_many({"torrent_id": {"$in": chunk}})
+
+    # 3) Eliminazione dei commenti degli utenti bannati sugli altri torrent
+    deleted_comments = 0
+    ratings_updated = 0
+    if purge_comments:
+        comments = list(db.comments.find(
+            {"author_id": {"$in": user_ids}, "deleted": False},
+            {"_id": 1, "torrent_id": 1}
+        ))
+        comment_ids = [c["_id"] for c in comments]
+        for chunk in chunked(comment_ids):
+            result = db.comments.update_many(
+                {"_id": {"$in": chunk}},
+                {"$set": {"deleted": True, "updated_at": now}}
+            )
+            deleted_comments += result.modified_count
+
+        # Una sola ricalcolazione per torrent, non una per commento
+        purged = set(purged_torrent_ids)
+        affected = {c["torrent_id"] for c in comments if c["torrent_id"] not in purged}
+        ratings_updated = recompute_ratings(affected)
+
+    return jsonify({
+        "status": "banned",
+        "banned_count": banned_count,
+        "deleted_torrents": deleted_torrents,
+        "deleted_comments": deleted_comments,
+        "ratings_updated": ratings_updated
+    })
+
+
 # ----------------- ADMIN: STATISTICHE -----------------
 
 @app.route("/api/stats/top-torrents", methods=["GET"])
@@ -606,8 +680,6 @@ def stats_top_torrents():
     torrents = list(
         db.torrents.find().sort(sort_field, DESCENDING).limit(10)
     )
-    for t in torrents:
-        t["_id"] = str(t["_id"])
     return jsonify(torrents)
 
 
@@ -0,0 +1,121 @@
+"""Micro-benchmark del livello di risposta JSON.
+
+Confronta, sulle forme delle risposte di lista, dettaglio e statistiche:
+- baseline: conversione manuale degli ObjectId + jsonify con json della stdlib, senza compressione
+- nuovo: BSONJSONProvider (orjson se installato) + gzip
+
+Non richiede MongoDB: i documenti sono generati in memoria.
+
+Uso: python bench_responses.py [ripetizioni]
+"""
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+
+import responses
+
+CATEGORIES = ["Film", "Serie TV", "Musica", "Giochi", "Software", "Libri", "Thriller", "Anime"]
+
+
+def make_torrent(rng, now):
+    return {
+        "_id": ObjectId(),
+        "title": f"Torrent {rng.randint(1, 10**6)} - Release 1080p",
+        "description": "Descrizione di esempio " * rng.randint(1, 6),
+        "size": round(rng.uniform(0.1, 60), 2),
+        "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+        "images": [f"https://img.example.com/{ObjectId()}.jpg" for _ in range(rng.randint(2, 6))],
+        "file_url": f"https://files.example.com/{ObjectId()}.torrent",
+        "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+        "uploaded_by": ObjectId(),
+        "average_rating": round(rng.uniform(1, 5), 2),
+        "ratings_count": rng.randint(0, 500),
+        "downloads_count": rng.randint(0, 10**5),
+    }
+
+
+def make_comment(rng, now, torrent_id):
+    return {
+        "_id": ObjectId(),
+        "torrent_id": torrent_id,
+        "author_id": ObjectId(),
+        "author_name": f"utente{rng.randint(1, 9999)}",
+        "rating": rng.randint(1, 5),
+        "text": "Commento di prova sul torrent. " * rng.randint(1, 5),
+        "created_at": now,
+        "updated_at": now,
+        "deleted": False,
+    }
+
+
+def build_payloads():
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    torrent = make_torrent(rng, now)
+    return {
+        "list (100 torrents)": [make_torrent(rng, now) for _ in range(100)],
+        "detail (torrent)": torrent,
+        "comments (50)": [make_comment(rng, now, torrent["_id"]) for _ in range(50)],
+        "stats top-torrents": [make_torrent(rng, now) for _ in range(10)],
+        "stats categories": [{"category": c, "count": rng.randint(1, 500)} for c in CATEGORIES],
+    }
+
+
+def legacy_convert(payload):
+    """Replica i cicli manuali di conversione ObjectId -> str presenti prima negli endpoint."""
+    docs = payload if isinstance(payload, list) else [payload]
+    out = []
+    for d in docs:
+        d = dict(d)
+        for key in ("_id", "uploaded_by", "torrent_id", "author_id"):
+            if isinstance(d.get(key), ObjectId):
+                d[key] = str(d[key])
+        out.append(d)
+    return out if isinstance(payload, list) else out[0]
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    legacy_app = Flask("legacy")
+    new_app = Flask("new")
+    responses.init_app(new_app)
+
+    encoder = "orjson" if responses.orjson is not None else "json (stdlib)"
+    print(f"encoder: {encoder}, ripetizioni: {number}")
+    print(f"{'risposta':<22}{'old ms':>9}{'new ms':>9}{'old bytes':>11}{'new bytes':>11}{'gzip ms':>9}")
+
+    headers = {"Accept-Encoding": "gzip"}
+    for name, payload in build_payloads().items():
+        with legacy_app.test_request_context(headers=headers):
+            def legacy():
+                return jsonify(legacy_convert(payload)).get_data()
+
+            old_body = legacy()
+            old_t = timeit.timeit(legacy, number=number) / number * 1000
+
+        with new_app.test_request_context(headers=headers):
+            def encode_only():
+                return jsonify(payload).get_data()
+
+            def encode_and_compress():
+                resp = responses.compress_response(
+                    jsonify(payload),
+                    min_size=new_app.config["COMPRESS_MIN_SIZE"],
+                    level=new_app.config["COMPRESS_LEVEL"],
+                )
+                return resp.get_data()
+
+            new_body = encode_and_compress()
+            new_t = timeit.timeit(encode_only, number=number) / number * 1000
+            gzip_t = timeit.timeit(encode_and_compress, number=number) / number * 1000
+
+        print(f"{name:<22}{old_t:>9.3f}{new_t:>9.3f}{len(old_body):>11}{len(new_body):>11}{gzip_t:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import gzip
+import json
+
+from bson.objectid import ObjectId
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # encoder veloce opzionale: senza orjson si usa json della stdlib
+    orjson = None
+
+# Soglie di default per la compressione gzip delle risposte
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+
+
+def bson_default(o):
+    """Serializza gli ObjectId e delega il resto al default di Flask (date, Decimal, UUID, ...)."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    return DefaultJSONProvider.default(o)
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """Provider JSON per Flask che codifica ObjectId e datetime e usa orjson se installato."""
+
+    default = staticmethod(bson_default)
+
+    def encode(self, obj, indent=False):
+        """Restituisce il JSON come bytes, con orjson quando possibile."""
+        if orjson is not None:
+            option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=bson_default, option=option)
+            except TypeError:
+                # es. interi oltre 64 bit: si ripiega sulla stdlib
+                pass
+
+        return json.dumps(
+            obj,
+            default=bson_default,
+            ensure_ascii=self.ensure_ascii,
+            sort_keys=self.sort_keys,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+        ).encode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = not self.compact if self.compact is not None else self._app.debug
+        body = self.encode(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def accepts_gzip():
+    return request.accept_encodings.quality("gzip") > 0
+
+
+def compress_response(response, min_size=COMPRESS_MIN_SIZE, level=COMPRESS_LEVEL):
+    """Comprime con gzip il body se è abbastanza grande e il client lo accetta."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code >= 300
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    if not accepts_gzip():
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=level))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def init_app(app):
+    """Installa il provider JSON e la compressione delle risposte sull'app Flask."""
+    app.config.setdefault("COMPRESS_MIN_SIZE", COMPRESS_MIN_SIZE)
+    app.config.setdefault("COMPRESS_LEVEL", COMPRESS_LEVEL)
+
+    app.json = BSONJSONProvider(app)
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(
+            response,
+            min_size=app.config["COMPRESS_MIN_SIZE"],
+            level=app.config["COMPRESS_LEVEL"],
+        )